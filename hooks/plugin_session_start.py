@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Claude Code Hook: Plugin SessionStart Loader
+============================================
+This hook runs as a single SessionStart hook for the local marketplace.
+It serves the precompiled additionalContext of the plugins named on its
+command line from .claude-plugin/plugin-cache.json, instead of forking one
+shell per plugin and re-parsing every plugin.json and hooks.json.
+
+Serving is opt-in: only the plugins listed as arguments are served, and only
+if the cache marks them static. A listed plugin that is still enabled in
+enabledPlugins is skipped, since Claude Code already runs its own hooks.
+Disable the listed plugins to have the loader serve them instead.
+
+The hot path only reads the cache and compares the size, mtime and mode of
+every source it was built from, so it imports nothing beyond json, os and sys.
+When the cache is missing or stale it is rebuilt in-process with
+scripts/build_plugin_cache.py. If the manifests are invalid, the errors are
+shown to the user and nothing is served.
+
+A Python process costs more than one bash handler, so this only pays off
+when serving several plugins; see the README for the break-even point. It
+has no dependencies, so run it with python3 directly rather than uv run:
+
+{
+  "hooks": {
+    "SessionStart": [
+      {
+        "hooks": [
+          {
+            "type": "command",
+            "command": "python3 $HOME/Develop/claude-code/hooks/plugin_session_start.py plugin-a plugin-b"
+          }
+        ]
+      }
+    ]
+  }
+}
+
+"""
+
+import json
+import os
+import sys
+
+# Must match scripts/build_plugin_cache.py
+CACHE_VERSION = 3
+CACHE_FILE = os.path.join(".claude-plugin", "plugin-cache.json")
+PRESENT = "present"
+
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def source_matches(path: str, signature) -> bool:
+    """Return True if path still matches the signature recorded at build time."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return signature is None
+    except OSError:
+        return False
+    if signature == PRESENT:
+        return True
+    return signature == [stat.st_size, stat.st_mtime_ns, stat.st_mode]
+
+
+def is_fresh(cache: dict, root: str) -> bool:
+    """Return True if no source the cache was built from has changed."""
+    if not isinstance(cache, dict) or cache.get("version") != CACHE_VERSION:
+        return False
+    sources = cache.get("sources")
+    if not isinstance(sources, dict) or not isinstance(cache.get("plugins"), dict):
+        return False
+    return all(source_matches(os.path.join(root, path), sig) for path, sig in sources.items())
+
+
+def read_cache(root: str) -> dict | None:
+    """Return the cache artifact for root if it exists and is fresh."""
+    try:
+        with open(os.path.join(root, CACHE_FILE)) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return cache if is_fresh(cache, root) else None
+
+
+def rebuild_cache(root: str) -> dict:
+    """Rebuild the cache for root, serving it from memory if it cannot be written.
+
+    Exits with status 1 if the manifests are invalid.
+    """
+    # Only a stale cache pays for importing the build script
+    sys.path.insert(0, os.path.join(_REPO_ROOT, "scripts"))
+    from pathlib import Path
+
+    from build_plugin_cache import ManifestError, build_cache, save_cache
+
+    try:
+        cache = build_cache(Path(root))
+    except ManifestError as e:
+        print(f"Plugin cache not built, invalid manifests:\n{e}", file=sys.stderr)
+        sys.exit(1)
+    except OSError as e:
+        print(f"Plugin cache not built: {e}", file=sys.stderr)
+        sys.exit(1)
+    try:
+        save_cache(Path(root), cache)
+    except OSError:
+        pass
+    return cache
+
+
+def load_cache(root: str) -> dict:
+    """Return the cache artifact for root, rebuilding it if missing or stale."""
+    return read_cache(root) or rebuild_cache(root)
+
+
+def settings_paths() -> list[str]:
+    """Return the settings files that can set enabledPlugins, lowest precedence first."""
+    project_dir = os.environ.get("CLAUDE_PROJECT_DIR", ".")
+    return [
+        os.path.join(os.path.expanduser("~"), ".claude", "settings.json"),
+        os.path.join(project_dir, ".claude", "settings.json"),
+        os.path.join(project_dir, ".claude", "settings.local.json"),
+    ]
+
+
+def enabled_plugins(paths: list) -> set[str]:
+    """Return the plugin ids (name@marketplace) enabled across the settings files."""
+    enabled: dict[str, bool] = {}
+    for path in paths:
+        try:
+            with open(path) as f:
+                settings = json.load(f)
+        except (OSError, ValueError):
+            continue
+        plugins = settings.get("enabledPlugins") if isinstance(settings, dict) else None
+        if isinstance(plugins, dict):
+            enabled.update({key: bool(val) for key, val in plugins.items()})
+    return {key for key, val in enabled.items() if val}
+
+
+def matches(matcher: str, source: str) -> bool:
+    """Return True if a SessionStart matcher applies to the session source."""
+    if matcher in ("", "*"):
+        return True
+    import re  # Most SessionStart hooks have no matcher; keep re off the hot path
+
+    try:
+        return re.fullmatch(matcher, source) is not None
+    except re.error:
+        return matcher == source
+
+
+def served_contexts(
+    cache: dict, names: list[str], enabled: set[str], source: str
+) -> tuple[list[str], list[str]]:
+    """Return the contexts to serve for the allowlisted plugins, and why any were skipped."""
+    contexts, skipped = [], []
+    for name in names:
+        plugin = cache["plugins"].get(name)
+        if plugin is None:
+            skipped.append(f"{name}: not in the marketplace")
+        elif not plugin["static"]:
+            skipped.append(f"{name}: not static, leave it enabled instead")
+        elif f"{name}@{cache['marketplace']}" in enabled:
+            skipped.append(f"{name}: still enabled, its own hooks already run")
+        else:
+            contexts.extend(
+                hook["additionalContext"]
+                for hook in plugin["sessionStart"]
+                if matches(hook["matcher"], source)
+            )
+    return contexts, skipped
+
+
+def parse_args(argv: list[str]) -> tuple[str, list[str]]:
+    """Parse [--root DIR] PLUGIN... without argparse, which is slow to import."""
+    if argv[:1] == ["--root"]:
+        if len(argv) < 2:
+            print("usage: plugin_session_start.py [--root DIR] PLUGIN...", file=sys.stderr)
+            sys.exit(1)
+        return argv[1], argv[2:]
+    return _REPO_ROOT, argv
+
+
+def main() -> None:
+    root, names = parse_args(sys.argv[1:])
+
+    try:
+        input_data = json.load(sys.stdin)
+    except ValueError:
+        input_data = {}
+    source = input_data.get("source", "startup") if isinstance(input_data, dict) else "startup"
+
+    cache = load_cache(root)
+    contexts, skipped = served_contexts(cache, names, enabled_plugins(settings_paths()), source)
+    for reason in skipped:
+        print(f"Not serving {reason}", file=sys.stderr)
+    if not contexts:
+        sys.exit(0)
+
+    output = {
+        "hookSpecificOutput": {
+            "hookEventName": "SessionStart",
+            "additionalContext": "\n\n".join(contexts),
+        }
+    }
+    print(json.dumps(output))
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
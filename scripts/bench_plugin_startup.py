@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Benchmark session-start cost for a local marketplace with many plugins.
+
+Generates a throwaway marketplace of N plugins, each with a static
+SessionStart hook shaped like explanatory-output-style's, and times:
+- fork: parse every manifest, then run every plugin's handler with bash in
+  parallel, as Claude Code runs all matching hooks
+- build: validate manifests and compile .claude-plugin/plugin-cache.json
+- loader: one run of hooks/plugin_session_start.py against a fresh cache,
+  invoked as the README documents (python3), and with uv run if installed
+
+and checks that the loader serves exactly what the handlers print.
+
+Usage:
+    python scripts/bench_plugin_startup.py [--plugins 48] [--runs 5]
+"""
+
+import argparse
+import json
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from build_plugin_cache import MARKETPLACE_FILE, build_cache, save_cache  # noqa: E402
+
+_LOADER = Path(__file__).resolve().parent.parent / "hooks/plugin_session_start.py"
+
+_HANDLER = """#!/bin/bash
+
+cat << 'EOF'
+{
+  "hookSpecificOutput": {
+    "hookEventName": "SessionStart",
+    "additionalContext": "Context from plugin %(name)s."
+  }
+}
+EOF
+
+exit 0
+"""
+
+
+def write_json(path: Path, data: dict) -> None:
+    """Write data as indented JSON, creating parent directories."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2)
+        f.write("\n")  # Add trailing newline
+
+
+def make_marketplace(root: Path, count: int) -> None:
+    """Create a marketplace of count plugins, each with one static SessionStart hook."""
+    entries = []
+    for i in range(count):
+        name = f"bench-plugin-{i:03d}"
+        plugin_dir = root / "plugins" / name
+        write_json(
+            plugin_dir / ".claude-plugin/plugin.json",
+            {"name": name, "version": "1.0.0", "description": f"Benchmark plugin {i}"},
+        )
+        write_json(
+            plugin_dir / "hooks/hooks.json",
+            {
+                "hooks": {
+                    "SessionStart": [
+                        {
+                            "hooks": [
+                                {
+                                    "type": "command",
+                                    "command": "${CLAUDE_PLUGIN_ROOT}/hooks-handlers/session-start.sh",
+                                }
+                            ]
+                        }
+                    ]
+                }
+            },
+        )
+        handler = plugin_dir / "hooks-handlers/session-start.sh"
+        handler.parent.mkdir(parents=True, exist_ok=True)
+        handler.write_text(_HANDLER % {"name": name})
+        handler.chmod(0o755)
+        entries.append({"name": name, "version": "1.0.0", "source": f"./plugins/{name}"})
+
+    write_json(root / MARKETPLACE_FILE, {"name": "bench-marketplace", "plugins": entries})
+
+
+def fork_per_plugin(root: Path) -> list[str]:
+    """Parse every manifest, then run all SessionStart handlers in parallel shells."""
+    with open(root / MARKETPLACE_FILE) as f:
+        marketplace = json.load(f)
+    commands = []
+    for entry in marketplace["plugins"]:
+        plugin_dir = root / entry["source"]
+        with open(plugin_dir / ".claude-plugin/plugin.json") as f:
+            json.load(f)
+        with open(plugin_dir / "hooks/hooks.json") as f:
+            hooks = json.load(f)
+        for matcher_entry in hooks["hooks"].get("SessionStart", []):
+            for hook in matcher_entry["hooks"]:
+                commands.append(hook["command"].replace("${CLAUDE_PLUGIN_ROOT}", str(plugin_dir)))
+
+    processes = [
+        subprocess.Popen(["bash", "-c", command], stdout=subprocess.PIPE) for command in commands
+    ]
+    contexts = []
+    for process in processes:
+        stdout, _ = process.communicate()
+        if process.returncode != 0:
+            raise subprocess.CalledProcessError(process.returncode, process.args)
+        contexts.append(json.loads(stdout)["hookSpecificOutput"]["additionalContext"])
+    return contexts
+
+
+def build(root: Path) -> dict:
+    """Validate the manifests and write the cache artifact."""
+    cache = build_cache(root)
+    save_cache(root, cache)
+    return cache
+
+
+def loader_command(root: Path, launcher: list[str]) -> list[str]:
+    """Return the loader invocation serving every plugin in the marketplace."""
+    with open(root / MARKETPLACE_FILE) as f:
+        names = [entry["name"] for entry in json.load(f)["plugins"]]
+    return [*launcher, str(_LOADER), "--root", str(root), *names]
+
+
+def run_loader(root: Path, launcher: list[str]) -> str:
+    """Run the cached SessionStart loader once, as Claude Code would."""
+    result = subprocess.run(
+        loader_command(root, launcher),
+        input=b'{"source": "startup"}',
+        capture_output=True,
+        check=True,
+    )
+    if not result.stdout:
+        return ""
+    return json.loads(result.stdout)["hookSpecificOutput"]["additionalContext"]
+
+
+def time_it(func, root: Path, runs: int) -> float:
+    """Return the median wall time of func(root) over runs, in milliseconds."""
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func(root)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--plugins", type=int, default=48, help="Number of plugins to generate")
+    parser.add_argument("--runs", type=int, default=5, help="Runs per measurement")
+    args = parser.parse_args()
+    if args.plugins < 1:
+        parser.error("--plugins must be at least 1")
+    if args.runs < 1:
+        parser.error("--runs must be at least 1")
+
+    launchers = {"python3": [shutil.which("python3") or sys.executable]}
+    if shutil.which("uv"):
+        launchers["uv run"] = ["uv", "run", "--quiet"]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        make_marketplace(root, args.plugins)
+
+        fork_ms = time_it(fork_per_plugin, root, args.runs)
+        build_ms = time_it(build, root, args.runs)
+        loader_ms = {
+            label: time_it(lambda r, launcher=launcher: run_loader(r, launcher), root, args.runs)
+            for label, launcher in launchers.items()
+        }
+
+        expected = "\n\n".join(fork_per_plugin(root))
+        for launcher in launchers.values():
+            if run_loader(root, launcher) != expected:
+                sys.exit("Error: cached loader output differs from the handlers' output")
+        served = sum(len(plugin["sessionStart"]) for plugin in build_cache(root)["plugins"].values())
+
+    print(f"Plugins: {args.plugins} ({served} static SessionStart hooks cached)")
+    print(f"Median of {args.runs} runs:")
+    print(f"  {'parallel forks:':<22} {fork_ms:8.1f} ms")
+    print(f"  {'build cache:':<22} {build_ms:8.1f} ms")
+    for label, ms in loader_ms.items():
+        print(f"  {'loader (' + label + '):':<22} {ms:8.1f} ms   speedup {fork_ms / ms:5.1f}x")
+    if "uv run" not in loader_ms:
+        print(f"  {'loader (uv run):':<22} uv not installed, not measured")
+
+
+if __name__ == "__main__":
+    main()
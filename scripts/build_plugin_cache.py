@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+"""
+Script to validate the local plugin marketplace and compile its hooks into
+a single cached artifact (.claude-plugin/plugin-cache.json).
+
+The artifact holds, per plugin:
+- the precompiled additionalContext of every static SessionStart hook
+- whether the plugin is static: its only hooks are static SessionStart hooks and
+  it has no commands, agents, skills, output styles, MCP or LSP servers, so
+  disabling it in favour of the cache loses nothing
+and the size, mtime and mode of every manifest and SessionStart handler it was built
+from, plus whether each optional plugin file or directory exists.
+
+A SessionStart hook is static when its handler is run by sh or bash and only
+prints a quoted heredoc (cat << 'EOF' ... EOF) before exiting 0, so its output
+can never change between runs. hooks/plugin_session_start.py serves static
+plugins from the artifact instead of forking a shell per plugin.
+
+Usage:
+    python scripts/build_plugin_cache.py [marketplace_root]
+"""
+
+import json
+import os
+import re
+import shlex
+import sys
+import tempfile
+from pathlib import Path
+
+CACHE_VERSION = 3
+MARKETPLACE_FILE = Path(".claude-plugin/marketplace.json")
+CACHE_FILE = Path(".claude-plugin/plugin-cache.json")
+PLUGIN_ROOT_VAR = "${CLAUDE_PLUGIN_ROOT}"
+
+# Source markers: the path must exist / must not exist for the cache to be fresh
+PRESENT = "present"
+ABSENT = None
+
+# Plugin parts that would be lost by disabling the plugin in favour of the cache
+_COMPONENT_PATHS = ("commands", "agents", "skills", "output-styles", ".mcp.json", ".lsp.json")
+_COMPONENT_KEYS = ("commands", "agents", "skills", "outputStyles", "mcpServers", "lspServers")
+
+_SHELLS = {"sh", "bash"}
+_HEREDOC_START = re.compile(r"""^cat\s*<<(-?)\s*(['"])(\w+)\2\s*$""")
+
+
+class ManifestError(Exception):
+    """Raised when a marketplace or plugin manifest is invalid."""
+
+
+def file_signature(path: Path) -> list[int]:
+    """Return the [size, mtime_ns, mode] the loader compares to detect a changed file.
+
+    The mode is included because a handler's exec bit decides whether it is static.
+    """
+    stat = path.stat()
+    return [stat.st_size, stat.st_mtime_ns, stat.st_mode]
+
+
+def source_key(path: Path, root: Path) -> str:
+    """Return path relative to the marketplace root, as stored in the cache."""
+    return os.path.relpath(path, root.resolve())
+
+
+def load_json(path: Path, errors: list[str]) -> dict | None:
+    """Load a JSON object from path, recording an error instead of raising."""
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        errors.append(f"{path}: file not found")
+        return None
+    except (OSError, UnicodeDecodeError) as e:
+        errors.append(f"{path}: unreadable ({e})")
+        return None
+    except json.JSONDecodeError as e:
+        errors.append(f"{path}: invalid JSON ({e})")
+        return None
+    if not isinstance(data, dict):
+        errors.append(f"{path}: expected a JSON object")
+        return None
+    return data
+
+
+def validate_hooks(hooks: dict, path: Path, errors: list[str]) -> None:
+    """Validate the structure of a hooks.json file."""
+    events = hooks.get("hooks")
+    if not isinstance(events, dict):
+        errors.append(f"{path}: 'hooks' must be an object keyed by event name")
+        return
+    for event, matchers in events.items():
+        if not isinstance(matchers, list):
+            errors.append(f"{path}: hooks.{event} must be a list")
+            continue
+        for i, entry in enumerate(matchers):
+            where = f"{path}: hooks.{event}[{i}]"
+            if not isinstance(entry, dict) or not isinstance(entry.get("hooks"), list):
+                errors.append(f"{where} must be an object with a 'hooks' list")
+                continue
+            if "matcher" in entry and not isinstance(entry["matcher"], str):
+                errors.append(f"{where}.matcher must be a string")
+            for j, hook in enumerate(entry["hooks"]):
+                if not isinstance(hook, dict) or hook.get("type") != "command":
+                    errors.append(f"{where}.hooks[{j}] must be a 'command' hook")
+                elif not isinstance(hook.get("command"), str) or not hook["command"]:
+                    errors.append(f"{where}.hooks[{j}].command must be a non-empty string")
+
+
+def shell_prefix(tokens: list[str]) -> int:
+    """Return how many leading tokens name sh or bash (bash, /bin/sh, env bash), else 0."""
+    if tokens and os.path.basename(tokens[0]) in _SHELLS:
+        return 1
+    if len(tokens) > 1 and os.path.basename(tokens[0]) == "env":
+        if os.path.basename(tokens[1]) in _SHELLS:
+            return 2
+    return 0
+
+
+def handler_script(command: str, plugin_dir: Path) -> tuple[Path, bool] | None:
+    """Return the script a hook command runs and whether a shell is named explicitly.
+
+    Returns None unless the command is a plain script invocation.
+    """
+    try:
+        tokens = shlex.split(command)
+    except ValueError:
+        return None
+    prefix = shell_prefix(tokens)
+    tokens = tokens[prefix:]
+    if len(tokens) != 1 or not tokens[0].startswith(PLUGIN_ROOT_VAR + "/"):
+        return None
+    return plugin_dir / tokens[0][len(PLUGIN_ROOT_VAR) + 1 :], bool(prefix)
+
+
+def runs_in_shell(script: Path, lines: list[str]) -> bool:
+    """Return True if executing script directly runs it with sh or bash."""
+    if not lines or not lines[0].startswith("#!") or not os.access(script, os.X_OK):
+        return False
+    return shell_prefix(lines[0][2:].split()) > 0
+
+
+def static_output(script: Path, explicit_shell: bool = False) -> str | None:
+    """Return the output of a script that only prints a quoted heredoc, else None.
+
+    A quoted heredoc delimiter disables all expansion, so the body is printed
+    verbatim. Any other statement makes the script dynamic. Unless the hook
+    command names the shell, the script must be executable with a sh or bash
+    shebang.
+    """
+    raw = script.read_text().splitlines()
+    if not explicit_shell and not runs_in_shell(script, raw):
+        return None
+    lines = [line for line in raw if line.strip() and not line.lstrip().startswith("#")]
+    if not lines:
+        return None
+    match = _HEREDOC_START.match(lines[0].strip())
+    if not match:
+        return None
+    strip_tabs, delimiter = bool(match.group(1)), match.group(3)
+
+    # Blank and comment-like lines inside the heredoc are part of the body
+    start = raw.index(lines[0]) + 1
+    body: list[str] = []
+    for end in range(start, len(raw)):
+        line = raw[end].lstrip("\t") if strip_tabs else raw[end]
+        if line == delimiter:
+            break
+        body.append(line)
+    else:
+        return None
+
+    rest = [
+        line.strip()
+        for line in raw[end + 1 :]
+        if line.strip() and not line.lstrip().startswith("#")
+    ]
+    if rest not in ([], ["exit 0"]):
+        return None
+    return "\n".join(body) + "\n"
+
+
+def session_start_context(output: str, script: Path, errors: list[str]) -> str | None:
+    """Extract additionalContext from a SessionStart hook's JSON output."""
+    try:
+        data = json.loads(output)
+    except json.JSONDecodeError as e:
+        errors.append(f"{script}: static output is not valid JSON ({e})")
+        return None
+    specific = data.get("hookSpecificOutput", {}) if isinstance(data, dict) else {}
+    if specific.get("hookEventName") != "SessionStart" or not isinstance(
+        specific.get("additionalContext"), str
+    ):
+        errors.append(f"{script}: static output has no SessionStart additionalContext")
+        return None
+    return specific["additionalContext"]
+
+
+def compile_session_start(
+    hooks: dict, plugin_dir: Path, root: Path, sources: dict, errors: list[str]
+) -> tuple[list[dict], bool]:
+    """Precompile the static SessionStart hooks of a validated hooks table.
+
+    Returns the compiled hooks and whether every hook of the plugin was one of them.
+    """
+    compiled = []
+    all_static = set(hooks) == {"SessionStart"}
+    for matcher_entry in hooks.get("SessionStart", []):
+        for hook in matcher_entry["hooks"]:
+            handler = handler_script(hook["command"], plugin_dir)
+            if handler is None:
+                all_static = False
+                continue
+            script, explicit_shell = handler
+            if not script.exists():
+                sources[source_key(script, root)] = ABSENT  # Creating it must invalidate the cache
+                all_static = False
+                continue
+            if not script.is_file():
+                all_static = False
+                continue
+            try:
+                sources[source_key(script, root)] = file_signature(script)
+                output = static_output(script, explicit_shell)
+            except (OSError, UnicodeDecodeError) as e:
+                errors.append(f"{script}: unreadable handler ({e})")
+                return [], False
+            if output is None:
+                all_static = False
+                continue
+            context = session_start_context(output, script, errors)
+            if context is None:
+                return [], False
+            compiled.append({"matcher": matcher_entry.get("matcher", ""), "additionalContext": context})
+    return compiled, all_static and bool(compiled)
+
+
+def compile_plugin(
+    entry: dict, marketplace_path: Path, root: Path, sources: dict, errors: list[str]
+) -> dict | None:
+    """Validate one marketplace entry and its manifests, returning its cache record.
+
+    Plugins using features the cache cannot serve, such as a remote source or
+    hooks declared in plugin.json, are recorded as not static.
+    """
+    name, source = entry.get("name"), entry.get("source")
+    if not isinstance(name, str) or not name or not source:
+        errors.append(f"{marketplace_path}: plugin entries need 'name' and 'source'")
+        return None
+    unservable = {"version": entry.get("version"), "static": False, "sessionStart": []}
+    if not isinstance(source, str):
+        return unservable
+
+    plugin_dir = (root / source).resolve()
+    manifest_path = plugin_dir / ".claude-plugin/plugin.json"
+    manifest = load_json(manifest_path, errors)
+    if manifest is None:
+        return None
+    sources[source_key(manifest_path, root)] = file_signature(manifest_path)
+
+    error_count = len(errors)
+    if manifest.get("name") != name:
+        errors.append(f"{manifest_path}: name {manifest.get('name')!r} != marketplace {name!r}")
+    if "version" in entry and manifest.get("version") != entry["version"]:
+        errors.append(
+            f"{manifest_path}: version {manifest.get('version')!r} "
+            f"!= marketplace {entry['version']!r}"
+        )
+
+    hooks: dict = {}
+    hooks_path = plugin_dir / "hooks/hooks.json"
+    hooks_key = source_key(hooks_path, root)
+    sources[hooks_key] = ABSENT  # Adding one later must invalidate the cache
+    if hooks_path.exists():
+        loaded = load_json(hooks_path, errors)
+        if loaded is not None:
+            sources[hooks_key] = file_signature(hooks_path)
+            validate_hooks(loaded, hooks_path, errors)
+            if len(errors) == error_count:
+                hooks = loaded["hooks"]
+
+    # Only compile hooks whose manifests passed validation
+    if len(errors) > error_count:
+        return None
+    session_start, static = compile_session_start(hooks, plugin_dir, root, sources, errors)
+    for component in _COMPONENT_PATHS:
+        path = plugin_dir / component
+        present = path.exists()
+        sources[source_key(path, root)] = PRESENT if present else ABSENT
+        static = static and not present
+    if "hooks" in manifest or any(key in manifest for key in _COMPONENT_KEYS):
+        static = False
+    return {"version": manifest.get("version"), "static": static, "sessionStart": session_start}
+
+
+def build_cache(root: Path) -> dict:
+    """Validate every manifest under root and return the compiled cache artifact.
+
+    Raises ManifestError listing every problem found.
+    """
+    errors: list[str] = []
+    marketplace_path = root / MARKETPLACE_FILE
+    marketplace = load_json(marketplace_path, errors)
+    if marketplace is None:
+        raise ManifestError("\n".join(errors))
+
+    entries = marketplace.get("plugins")
+    if not isinstance(entries, list):
+        raise ManifestError(f"{marketplace_path}: 'plugins' must be a list")
+
+    sources: dict = {str(MARKETPLACE_FILE): file_signature(marketplace_path)}
+    plugins = {}
+    for entry in entries:
+        if not isinstance(entry, dict):
+            errors.append(f"{marketplace_path}: plugin entries must be objects")
+            continue
+        plugin = compile_plugin(entry, marketplace_path, root, sources, errors)
+        if plugin is not None and entry["name"] in plugins:
+            errors.append(f"{marketplace_path}: duplicate plugin name {entry['name']!r}")
+        elif plugin is not None:
+            plugins[entry["name"]] = plugin
+
+    if errors:
+        raise ManifestError("\n".join(errors))
+
+    return {
+        "version": CACHE_VERSION,
+        "marketplace": marketplace.get("name"),
+        "sources": sources,
+        "plugins": plugins,
+    }
+
+
+def save_cache(root: Path, cache: dict) -> None:
+    """Atomically write the cache artifact next to marketplace.json.
+
+    Each writer uses its own temp file, so concurrent sessions never clobber
+    each other; the last rename wins with identical content.
+    """
+    cache_path = root / CACHE_FILE
+    with tempfile.NamedTemporaryFile(
+        "w", dir=cache_path.parent, prefix=cache_path.name, suffix=".tmp", delete=False
+    ) as f:
+        tmp_path = Path(f.name)
+        try:
+            json.dump(cache, f, indent=2)
+            f.write("\n")  # Add trailing newline
+        except BaseException:
+            f.close()
+            tmp_path.unlink(missing_ok=True)
+            raise
+    try:
+        # NamedTemporaryFile is always 0600; honour the umask like a plain open()
+        umask = os.umask(0)
+        os.umask(umask)
+        tmp_path.chmod(0o666 & ~umask)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def main() -> None:
+    root = Path(sys.argv[1]) if len(sys.argv) > 1 else Path(".")
+
+    try:
+        cache = build_cache(root)
+        save_cache(root, cache)
+    except ManifestError as e:
+        print(f"Error: invalid plugin manifests:\n{e}", file=sys.stderr)
+        sys.exit(1)
+    except OSError as e:
+        print(f"Error: could not write {root / CACHE_FILE}: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    hooks = sum(len(plugin["sessionStart"]) for plugin in cache["plugins"].values())
+    static = [name for name, plugin in cache["plugins"].items() if plugin["static"]]
+    print(f"Wrote {root / CACHE_FILE}")
+    print(f"Validated {len(cache['plugins'])} plugin(s) from {len(cache['sources'])} path(s)")
+    print(f"Precompiled {hooks} static SessionStart hook(s)")
+    print(f"Plugins the loader can serve: {', '.join(static) or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,376 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+_REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(_REPO_ROOT / "scripts"))
+sys.path.insert(0, str(_REPO_ROOT / "hooks"))
+
+import build_plugin_cache as build  # noqa: E402
+import plugin_session_start as loader  # noqa: E402
+
+HANDLER = "${CLAUDE_PLUGIN_ROOT}/hooks-handlers/session-start.sh"
+STATIC_SCRIPT = """#!/bin/bash
+# Static context
+cat << 'EOF'
+{"hookSpecificOutput": {"hookEventName": "SessionStart", "additionalContext": "ctx %s"}}
+EOF
+
+exit 0
+"""
+
+
+def write_json(path: Path, data) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(data))
+
+
+def session_start_hooks(command: str = HANDLER) -> dict:
+    return {"hooks": {"SessionStart": [{"hooks": [{"type": "command", "command": command}]}]}}
+
+
+def make_marketplace(root: Path, plugins: dict[str, dict | None], scripts: dict[str, str]) -> None:
+    """Create a marketplace whose plugins have the given hooks.json and handler scripts."""
+    entries = []
+    for name, hooks in plugins.items():
+        plugin_dir = root / "plugins" / name
+        write_json(plugin_dir / ".claude-plugin/plugin.json", {"name": name, "version": "1.0.0"})
+        if hooks is not None:
+            write_json(plugin_dir / "hooks/hooks.json", hooks)
+        if name in scripts:
+            script = plugin_dir / "hooks-handlers/session-start.sh"
+            script.parent.mkdir(parents=True, exist_ok=True)
+            script.write_text(scripts[name])
+            script.chmod(0o755)
+        entries.append({"name": name, "version": "1.0.0", "source": f"./plugins/{name}"})
+    write_json(root / build.MARKETPLACE_FILE, {"name": "local", "plugins": entries})
+
+
+@pytest.fixture
+def marketplace(tmp_path: Path) -> Path:
+    make_marketplace(tmp_path, {"static": session_start_hooks()}, {"static": STATIC_SCRIPT % "a"})
+    return tmp_path
+
+
+def script(tmp_path: Path, text: str, mode: int = 0o755) -> Path:
+    path = tmp_path / "handler.sh"
+    path.write_text(text)
+    path.chmod(mode)
+    return path
+
+
+class TestStaticOutput:
+    def test_quoted_heredoc(self, tmp_path):
+        assert build.static_output(script(tmp_path, STATIC_SCRIPT % "a")) == (
+            '{"hookSpecificOutput": {"hookEventName": "SessionStart", "additionalContext": "ctx a"}}\n'
+        )
+
+    def test_dash_heredoc_strips_leading_tabs(self, tmp_path):
+        text = "#!/bin/sh\ncat <<- \"END\"\n\tline one\n\t\tline two\n\tEND\n"
+        assert build.static_output(script(tmp_path, text)) == "line one\nline two\n"
+
+    def test_blank_and_comment_lines_in_body_are_kept(self, tmp_path):
+        text = "#!/bin/bash\n\ncat << 'EOF'\n# not a comment\n\nbody\nEOF\n"
+        assert build.static_output(script(tmp_path, text)) == "# not a comment\n\nbody\n"
+
+    def test_indented_delimiter_without_dash_does_not_terminate(self, tmp_path):
+        assert build.static_output(script(tmp_path, "#!/bin/bash\ncat << 'EOF'\nbody\n  EOF\n")) is None
+
+    def test_env_shebang(self, tmp_path):
+        text = "#!/usr/bin/env bash\ncat << 'EOF'\nbody\nEOF\n"
+        assert build.static_output(script(tmp_path, text)) == "body\n"
+
+    @pytest.mark.parametrize(
+        ("text", "mode"),
+        [
+            ("#!/usr/bin/env python3\ncat << 'EOF'\nbody\nEOF\n", 0o755),
+            ("#!/bin/zsh\ncat << 'EOF'\nbody\nEOF\n", 0o755),
+            ("cat << 'EOF'\nbody\nEOF\n", 0o755),
+            ("#!/bin/bash\ncat << 'EOF'\nbody\nEOF\n", 0o644),
+        ],
+    )
+    def test_not_run_by_shell(self, tmp_path, text, mode):
+        assert build.static_output(script(tmp_path, text, mode)) is None
+
+    def test_explicit_shell_needs_no_shebang(self, tmp_path):
+        path = script(tmp_path, "cat << 'EOF'\nbody\nEOF\n", 0o644)
+        assert build.static_output(path, explicit_shell=True) == "body\n"
+
+    @pytest.mark.parametrize(
+        "text",
+        [
+            "#!/bin/bash\ncat << EOF\n$HOME\nEOF\n",
+            "#!/bin/bash\ncat << 'EOF'\nbody\nEOF\necho more\n",
+            "#!/bin/bash\ncat << 'EOF'\nbody\nEOF\nexit 1\n",
+            "#!/bin/bash\ncat << 'EOF'\nbody\n",
+            "#!/bin/bash\necho hi\ncat << 'EOF'\nbody\nEOF\n",
+            "#!/bin/bash\n# only a comment\n",
+        ],
+    )
+    def test_dynamic_scripts(self, tmp_path, text):
+        assert build.static_output(script(tmp_path, text)) is None
+
+
+class TestHandlerScript:
+    @pytest.mark.parametrize(
+        ("command", "explicit_shell"),
+        [
+            (HANDLER, False),
+            (f"bash {HANDLER}", True),
+            (f"/bin/sh {HANDLER}", True),
+            (f"/usr/bin/env bash {HANDLER}", True),
+            (f"env sh {HANDLER}", True),
+        ],
+    )
+    def test_plain_invocations(self, tmp_path, command, explicit_shell):
+        path = tmp_path / "hooks-handlers/session-start.sh"
+        assert build.handler_script(command, tmp_path) == (path, explicit_shell)
+
+    @pytest.mark.parametrize(
+        "command",
+        [f"/usr/bin/env python3 {HANDLER}", f"{HANDLER} --flag", "/abs/handler.sh", "bash 'unterminated"],
+    )
+    def test_other_commands(self, tmp_path, command):
+        assert build.handler_script(command, tmp_path) is None
+
+
+def is_fresh(cache: dict, root: Path) -> bool:
+    return loader.is_fresh(json.loads(json.dumps(cache)), str(root))
+
+
+class TestIsFresh:
+    def test_fresh_after_build(self, marketplace):
+        assert is_fresh(build.build_cache(marketplace), marketplace)
+
+    def test_changed_handler(self, marketplace):
+        cache = build.build_cache(marketplace)
+        (marketplace / "plugins/static/hooks-handlers/session-start.sh").write_text(STATIC_SCRIPT % "changed")
+        assert not is_fresh(cache, marketplace)
+
+    def test_touched_handler(self, marketplace):
+        cache = build.build_cache(marketplace)
+        handler = marketplace / "plugins/static/hooks-handlers/session-start.sh"
+        stat = handler.stat()
+        os.utime(handler, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+        assert not is_fresh(cache, marketplace)
+
+    def test_handler_loses_exec_bit(self, marketplace):
+        cache = build.build_cache(marketplace)
+        (marketplace / "plugins/static/hooks-handlers/session-start.sh").chmod(0o644)
+        assert not is_fresh(cache, marketplace)
+
+    def test_created_hooks_json(self, tmp_path):
+        make_marketplace(tmp_path, {"plain": None}, {})
+        cache = build.build_cache(tmp_path)
+        write_json(tmp_path / "plugins/plain/hooks/hooks.json", session_start_hooks())
+        assert not is_fresh(cache, tmp_path)
+
+    def test_created_handler(self, tmp_path):
+        make_marketplace(tmp_path, {"late": session_start_hooks()}, {})
+        cache = build.build_cache(tmp_path)
+        assert cache["plugins"]["late"]["sessionStart"] == []
+        script = tmp_path / "plugins/late/hooks-handlers/session-start.sh"
+        script.parent.mkdir(parents=True)
+        script.write_text(STATIC_SCRIPT % "late")
+        assert not is_fresh(cache, tmp_path)
+
+    def test_created_component(self, marketplace):
+        cache = build.build_cache(marketplace)
+        (marketplace / "plugins/static/commands").mkdir()
+        assert not is_fresh(cache, marketplace)
+
+    def test_removed_component(self, marketplace):
+        commands = marketplace / "plugins/static/commands"
+        commands.mkdir()
+        cache = build.build_cache(marketplace)
+        assert not cache["plugins"]["static"]["static"]
+        commands.rmdir()
+        assert not is_fresh(cache, marketplace)
+
+    def test_old_version(self, marketplace):
+        cache = build.build_cache(marketplace)
+        cache["version"] = build.CACHE_VERSION - 1
+        assert not is_fresh(cache, marketplace)
+
+
+class TestBuildCache:
+    def test_static_plugin(self, marketplace):
+        plugin = build.build_cache(marketplace)["plugins"]["static"]
+        assert plugin["static"]
+        assert plugin["sessionStart"] == [{"matcher": "", "additionalContext": "ctx a"}]
+
+    def test_plugin_with_other_hooks_is_not_static(self, tmp_path):
+        hooks = session_start_hooks()
+        hooks["hooks"]["PostToolUse"] = [{"hooks": [{"type": "command", "command": "true"}]}]
+        make_marketplace(tmp_path, {"mixed": hooks}, {"mixed": STATIC_SCRIPT % "m"})
+        plugin = build.build_cache(tmp_path)["plugins"]["mixed"]
+        assert not plugin["static"]
+        assert len(plugin["sessionStart"]) == 1
+
+    @pytest.mark.parametrize(
+        "hooks",
+        [
+            {"hooks": {"SessionStart": 5}},
+            {"hooks": {"SessionStart": [{"hooks": 3}]}},
+            {"hooks": {"SessionStart": [{"hooks": [{"type": "command", "command": 3}]}]}},
+            {"hooks": {"SessionStart": ["not an object"]}},
+            {"hooks": []},
+        ],
+    )
+    def test_malformed_hooks(self, tmp_path, hooks):
+        make_marketplace(tmp_path, {"bad": hooks}, {})
+        with pytest.raises(build.ManifestError):
+            build.build_cache(tmp_path)
+
+    def test_remote_source_is_not_static(self, marketplace):
+        path = marketplace / build.MARKETPLACE_FILE
+        data = json.loads(path.read_text())
+        data["plugins"].append({"name": "remote", "source": {"source": "github", "repo": "a/b"}})
+        write_json(path, data)
+        plugins = build.build_cache(marketplace)["plugins"]
+        assert not plugins["remote"]["static"]
+        assert plugins["static"]["static"]
+
+    @pytest.mark.parametrize("hooks", ["./custom.json", {"SessionStart": []}])
+    def test_hooks_in_plugin_json_is_not_static(self, marketplace, hooks):
+        manifest = marketplace / "plugins/static/.claude-plugin/plugin.json"
+        write_json(manifest, {"name": "static", "version": "1.0.0", "hooks": hooks})
+        assert not build.build_cache(marketplace)["plugins"]["static"]["static"]
+
+    @pytest.mark.parametrize(
+        ("component", "is_dir"),
+        [
+            ("commands", True),
+            ("agents", True),
+            ("skills", True),
+            ("output-styles", True),
+            (".mcp.json", False),
+            (".lsp.json", False),
+        ],
+    )
+    def test_component_path_is_not_static(self, marketplace, component, is_dir):
+        path = marketplace / "plugins/static" / component
+        path.mkdir() if is_dir else path.write_text("{}")
+        assert not build.build_cache(marketplace)["plugins"]["static"]["static"]
+
+    @pytest.mark.parametrize(
+        "key", ["commands", "agents", "skills", "outputStyles", "mcpServers", "lspServers"]
+    )
+    def test_component_key_is_not_static(self, marketplace, key):
+        manifest = marketplace / "plugins/static/.claude-plugin/plugin.json"
+        write_json(manifest, {"name": "static", "version": "1.0.0", key: "./somewhere"})
+        assert not build.build_cache(marketplace)["plugins"]["static"]["static"]
+
+    def test_save_cache_honours_umask(self, marketplace):
+        umask = os.umask(0o022)
+        try:
+            build.save_cache(marketplace, build.build_cache(marketplace))
+        finally:
+            os.umask(umask)
+        assert (marketplace / build.CACHE_FILE).stat().st_mode & 0o777 == 0o644
+        assert list((marketplace / ".claude-plugin").glob("*.tmp")) == []
+
+    def test_name_mismatch(self, marketplace):
+        manifest = marketplace / "plugins/static/.claude-plugin/plugin.json"
+        write_json(manifest, {"name": "other", "version": "1.0.0"})
+        with pytest.raises(build.ManifestError, match="name"):
+            build.build_cache(marketplace)
+
+
+class TestLoader:
+    def test_serves_only_allowlisted_plugins(self, tmp_path):
+        make_marketplace(
+            tmp_path,
+            {"a": session_start_hooks(), "b": session_start_hooks()},
+            {"a": STATIC_SCRIPT % "a", "b": STATIC_SCRIPT % "b"},
+        )
+        cache = build.build_cache(tmp_path)
+        contexts, skipped = loader.served_contexts(cache, ["b"], set(), "startup")
+        assert contexts == ["ctx b"]
+        assert skipped == []
+
+    def test_skips_enabled_and_unknown_plugins(self, marketplace):
+        cache = build.build_cache(marketplace)
+        contexts, skipped = loader.served_contexts(
+            cache, ["static", "missing"], {"static@local"}, "startup"
+        )
+        assert contexts == []
+        assert len(skipped) == 2
+
+    def test_matcher(self, tmp_path):
+        hooks = session_start_hooks()
+        hooks["hooks"]["SessionStart"][0]["matcher"] = "startup|clear"
+        make_marketplace(tmp_path, {"m": hooks}, {"m": STATIC_SCRIPT % "m"})
+        cache = build.build_cache(tmp_path)
+        assert loader.served_contexts(cache, ["m"], set(), "clear")[0] == ["ctx m"]
+        assert loader.served_contexts(cache, ["m"], set(), "resume")[0] == []
+
+    def test_enabled_plugins_precedence(self, tmp_path):
+        user, local = tmp_path / "user.json", tmp_path / "local.json"
+        write_json(user, {"enabledPlugins": {"a@local": True, "b@local": True}})
+        write_json(local, {"enabledPlugins": {"b@local": False}})
+        assert loader.enabled_plugins([user, tmp_path / "missing.json", local]) == {"a@local"}
+
+    def test_serves_from_memory_when_write_fails(self, marketplace, monkeypatch):
+        def fail(root, cache):
+            raise PermissionError("read-only")
+
+        monkeypatch.setattr(build, "save_cache", fail)
+        assert loader.load_cache(str(marketplace))["plugins"]["static"]["static"]
+        assert not (marketplace / build.CACHE_FILE).exists()
+
+    def test_rebuilds_stale_cache(self, marketplace):
+        loader.load_cache(str(marketplace))
+        (marketplace / "plugins/static/hooks-handlers/session-start.sh").write_text(STATIC_SCRIPT % "changed")
+        cache = loader.load_cache(str(marketplace))
+        assert cache["plugins"]["static"]["sessionStart"][0]["additionalContext"] == "ctx changed"
+
+    def test_constants_match_build_script(self):
+        assert loader.CACHE_VERSION == build.CACHE_VERSION
+        assert loader.CACHE_FILE == str(build.CACHE_FILE)
+        assert loader.PRESENT == build.PRESENT
+
+
+def run_main(root: Path, *args: str, stdin: str = '{"source": "startup"}'):
+    env = {**os.environ, "HOME": str(root), "CLAUDE_PROJECT_DIR": str(root)}
+    return subprocess.run(
+        [sys.executable, str(_REPO_ROOT / "hooks/plugin_session_start.py"), "--root", str(root), *args],
+        input=stdin,
+        capture_output=True,
+        text=True,
+        env=env,
+    )
+
+
+class TestLoaderMain:
+    def test_outputs_session_start_json(self, marketplace):
+        result = run_main(marketplace, "static")
+        assert result.returncode == 0
+        assert json.loads(result.stdout) == {
+            "hookSpecificOutput": {"hookEventName": "SessionStart", "additionalContext": "ctx a"}
+        }
+        assert (marketplace / build.CACHE_FILE).exists()
+
+    def test_invalid_stdin_defaults_to_startup(self, marketplace):
+        result = run_main(marketplace, "static", stdin="not json")
+        assert result.returncode == 0
+        assert json.loads(result.stdout)["hookSpecificOutput"]["additionalContext"] == "ctx a"
+
+    def test_nothing_to_serve(self, marketplace):
+        write_json(marketplace / ".claude/settings.json", {"enabledPlugins": {"static@local": True}})
+        result = run_main(marketplace, "static")
+        assert result.returncode == 0
+        assert result.stdout == ""
+        assert "still enabled" in result.stderr
+
+    def test_invalid_manifests_exit_1(self, marketplace):
+        write_json(marketplace / "plugins/static/hooks/hooks.json", {"hooks": {"SessionStart": 5}})
+        result = run_main(marketplace, "static")
+        assert result.returncode == 1
+        assert result.stdout == ""
+        assert "invalid manifests" in result.stderr
+        assert "Traceback" not in result.stderr